@@ -4,117 +4,194 @@ Detects anomalies in production data and generates alerts
 """
 
 import random
-from datetime import datetime
-from typing import List, Dict
-from data_models import ProductionLine, Alert, AlertSeverity, MachineHealth
+import sys
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import List, Dict, Tuple
+from data_models import ProductionLine, Alert, AlertSeverity, MachineHealth, SensorFrame
+
+
+# Alert thresholds
+TEMP_WARN, TEMP_CRIT = 38.0, 42.0
+PRESSURE_WARN_LOW, PRESSURE_WARN_HIGH = 5.2, 6.8
+PRESSURE_CRIT_LOW, PRESSURE_CRIT_HIGH = 5.0, 7.0
+VIBRATION_WARN, VIBRATION_CRIT = 3.0, 3.5
+EFFICIENCY_WARN, EFFICIENCY_CRIT = 75.0, 65.0
+DEFECT_RATE_WARN, DEFECT_RATE_CRIT = 5.0, 8.0
+
+# Interned health status names, shared by every MachineHealth instance
+NORMAL = sys.intern("normal")
+WARN = sys.intern("warning")
+CRIT = sys.intern("critical")
+
+# Lookup tables indexed by health status code (0=normal, 1=warning, 2=critical)
+_STATUS_NAMES = (NORMAL, WARN, CRIT)
+_TEMP_PENALTIES = np.array([0.0, 10.0, 30.0])
+_PRESSURE_PENALTIES = np.array([0.0, 10.0, 30.0])
+_VIBRATION_PENALTIES = np.array([0.0, 15.0, 35.0])
+_TEMP_RECOMMENDATIONS = (None, "Monitor cooling system", "Immediate cooling system inspection required")
+_PRESSURE_RECOMMENDATIONS = (None, "Pressure calibration recommended", "Critical pressure adjustment needed")
+_VIBRATION_RECOMMENDATIONS = (None, "Schedule bearing inspection", "Immediate mechanical inspection required")
 
 
 class AnomalyDetector:
     """Detects anomalies and generates alerts"""
     
+    # Severity values bound once instead of resolved through the enum per alert
+    _SEV_CRIT = AlertSeverity.CRITICAL.value
+    _SEV_WARN = AlertSeverity.WARNING.value
+    _SEV_INFO = AlertSeverity.INFO.value
+    
     def __init__(self):
-        self.alerts = []
+        self.alerts = deque(maxlen=50)  # keep only recent alerts
+        self._alerts_by_id: Dict[str, Alert] = {}
+        self._active_counts = {
+            self._SEV_CRIT: 0,
+            self._SEV_WARN: 0,
+            self._SEV_INFO: 0
+        }
+        self.alerts_version = 0  # bumped whenever an alert is added or changes state
+        # Serializes alert creation/eviction (background task) with
+        # acknowledge/resolve (request threads)
+        self._alerts_lock = threading.Lock()
+        self._active_alerts_cache: Tuple[int, List[Dict]] = (-1, [])
+        self._health_cache: Tuple[int, List[Dict]] = (-1, [])
         self.alert_counter = 0
-        self.thresholds = {
-            "temperature": {"warning": 38, "critical": 42},
-            "pressure": {"warning_low": 5.2, "warning_high": 6.8, "critical_low": 5.0, "critical_high": 7.0},
-            "vibration": {"warning": 3.0, "critical": 3.5},
-            "efficiency": {"warning": 75, "critical": 65},
-            "defect_rate": {"warning": 5.0, "critical": 8.0}
+        self._id_prefix = "ALT-"
+    
+    @property
+    def thresholds(self) -> Dict[str, Dict[str, float]]:
+        """Alert thresholds grouped by metric"""
+        return {
+            "temperature": {"warning": TEMP_WARN, "critical": TEMP_CRIT},
+            "pressure": {"warning_low": PRESSURE_WARN_LOW, "warning_high": PRESSURE_WARN_HIGH,
+                         "critical_low": PRESSURE_CRIT_LOW, "critical_high": PRESSURE_CRIT_HIGH},
+            "vibration": {"warning": VIBRATION_WARN, "critical": VIBRATION_CRIT},
+            "efficiency": {"warning": EFFICIENCY_WARN, "critical": EFFICIENCY_CRIT},
+            "defect_rate": {"warning": DEFECT_RATE_WARN, "critical": DEFECT_RATE_CRIT}
         }
     
     def detect_anomalies(self, line: ProductionLine) -> List[Alert]:
         """Detect anomalies in production line data"""
+        return self.detect_anomalies_batch(SensorFrame.from_lines([line]), [line])
+    
+    def detect_anomalies_batch(self, frame: SensorFrame, lines: List[ProductionLine]) -> List[Alert]:
+        """Detect anomalies for all production lines in a single vectorized pass"""
         new_alerts = []
         
-        # Temperature anomalies
-        if line.temperature >= self.thresholds["temperature"]["critical"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.CRITICAL.value,
-                "Critical Temperature",
-                f"Temperature at {line.temperature:.1f}°C exceeds critical threshold"
-            ))
-        elif line.temperature >= self.thresholds["temperature"]["warning"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.WARNING.value,
-                "High Temperature",
-                f"Temperature at {line.temperature:.1f}°C above normal range"
-            ))
+        # Threshold masks, evaluated once per sensor across all lines
+        crit_t = frame.temp >= TEMP_CRIT
+        warn_t = ~crit_t & (frame.temp >= TEMP_WARN)
         
-        # Pressure anomalies
-        if line.pressure <= self.thresholds["pressure"]["critical_low"] or \
-           line.pressure >= self.thresholds["pressure"]["critical_high"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.CRITICAL.value,
-                "Critical Pressure",
-                f"Pressure at {line.pressure:.1f} bar outside safe operating range"
-            ))
-        elif line.pressure <= self.thresholds["pressure"]["warning_low"] or \
-             line.pressure >= self.thresholds["pressure"]["warning_high"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.WARNING.value,
-                "Pressure Deviation",
-                f"Pressure at {line.pressure:.1f} bar deviating from optimal range"
-            ))
+        crit_p = (frame.pressure <= PRESSURE_CRIT_LOW) | (frame.pressure >= PRESSURE_CRIT_HIGH)
+        warn_p = ~crit_p & ((frame.pressure <= PRESSURE_WARN_LOW) | (frame.pressure >= PRESSURE_WARN_HIGH))
         
-        # Vibration anomalies
-        if line.vibration >= self.thresholds["vibration"]["critical"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.CRITICAL.value,
-                "Excessive Vibration",
-                f"Vibration at {line.vibration:.1f} mm/s indicates potential mechanical failure"
-            ))
-        elif line.vibration >= self.thresholds["vibration"]["warning"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.WARNING.value,
-                "High Vibration",
-                f"Vibration at {line.vibration:.1f} mm/s above normal levels"
-            ))
+        crit_v = frame.vibration >= VIBRATION_CRIT
+        warn_v = ~crit_v & (frame.vibration >= VIBRATION_WARN)
         
-        # Efficiency anomalies
-        if line.efficiency <= self.thresholds["efficiency"]["critical"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.CRITICAL.value,
-                "Critical Efficiency Drop",
-                f"Efficiency at {line.efficiency:.1f}% requires immediate attention"
-            ))
-        elif line.efficiency <= self.thresholds["efficiency"]["warning"]:
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.WARNING.value,
-                "Low Efficiency",
-                f"Efficiency at {line.efficiency:.1f}% below target"
-            ))
+        crit_e = frame.efficiency <= EFFICIENCY_CRIT
+        warn_e = ~crit_e & (frame.efficiency <= EFFICIENCY_WARN)
         
-        # Status-based alerts
-        if line.status == "error":
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.CRITICAL.value,
-                "Line Error",
-                f"Production line {line.name} has encountered an error"
-            ))
-        elif line.status == "maintenance":
-            new_alerts.append(self._create_alert(
-                line.line_id,
-                AlertSeverity.INFO.value,
-                "Maintenance Mode",
-                f"Production line {line.name} is under maintenance"
-            ))
+        status_flagged = np.fromiter((line.status in ("error", "maintenance") for line in lines),
+                                     dtype=bool, count=len(lines))
         
-        # Add new alerts to the list
-        self.alerts.extend(new_alerts)
+        flagged = crit_t | warn_t | crit_p | warn_p | crit_v | warn_v | crit_e | warn_e | status_flagged
         
-        # Keep only recent alerts (last 50)
-        if len(self.alerts) > 50:
-            self.alerts = self.alerts[-50:]
+        # Only build alerts for lines that tripped at least one check
+        for i in np.flatnonzero(flagged).tolist():
+            line = lines[i]
+            
+            # Temperature anomalies
+            if crit_t[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_CRIT,
+                    "Critical Temperature",
+                    "Temperature at {:.1f}°C exceeds critical threshold",
+                    (frame.temp[i],)
+                ))
+            elif warn_t[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_WARN,
+                    "High Temperature",
+                    "Temperature at {:.1f}°C above normal range",
+                    (frame.temp[i],)
+                ))
+            
+            # Pressure anomalies
+            if crit_p[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_CRIT,
+                    "Critical Pressure",
+                    "Pressure at {:.1f} bar outside safe operating range",
+                    (frame.pressure[i],)
+                ))
+            elif warn_p[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_WARN,
+                    "Pressure Deviation",
+                    "Pressure at {:.1f} bar deviating from optimal range",
+                    (frame.pressure[i],)
+                ))
+            
+            # Vibration anomalies
+            if crit_v[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_CRIT,
+                    "Excessive Vibration",
+                    "Vibration at {:.1f} mm/s indicates potential mechanical failure",
+                    (frame.vibration[i],)
+                ))
+            elif warn_v[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_WARN,
+                    "High Vibration",
+                    "Vibration at {:.1f} mm/s above normal levels",
+                    (frame.vibration[i],)
+                ))
+            
+            # Efficiency anomalies
+            if crit_e[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_CRIT,
+                    "Critical Efficiency Drop",
+                    "Efficiency at {:.1f}% requires immediate attention",
+                    (frame.efficiency[i],)
+                ))
+            elif warn_e[i]:
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_WARN,
+                    "Low Efficiency",
+                    "Efficiency at {:.1f}% below target",
+                    (frame.efficiency[i],)
+                ))
+            
+            # Status-based alerts
+            if line.status == "error":
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_CRIT,
+                    "Line Error",
+                    "Production line {} has encountered an error",
+                    (line.name,)
+                ))
+            elif line.status == "maintenance":
+                new_alerts.append(self._create_alert(
+                    line.line_id,
+                    self._SEV_INFO,
+                    "Maintenance Mode",
+                    "Production line {} is under maintenance",
+                    (line.name,)
+                ))
         
         return new_alerts
     
@@ -125,137 +202,175 @@ class AnomalyDetector:
         defect_rate = quality_metrics.get('defect_rate', 0)
         line_id = quality_metrics.get('line_id', 'UNKNOWN')
         
-        if defect_rate >= self.thresholds["defect_rate"]["critical"]:
+        if defect_rate >= DEFECT_RATE_CRIT:
             new_alerts.append(self._create_alert(
                 line_id,
-                AlertSeverity.CRITICAL.value,
+                self._SEV_CRIT,
                 "Critical Defect Rate",
-                f"Defect rate at {defect_rate:.1f}% exceeds acceptable limits"
+                "Defect rate at {:.1f}% exceeds acceptable limits",
+                (defect_rate,)
             ))
-        elif defect_rate >= self.thresholds["defect_rate"]["warning"]:
+        elif defect_rate >= DEFECT_RATE_WARN:
             new_alerts.append(self._create_alert(
                 line_id,
-                AlertSeverity.WARNING.value,
+                self._SEV_WARN,
                 "High Defect Rate",
-                f"Defect rate at {defect_rate:.1f}% above target"
+                "Defect rate at {:.1f}% above target",
+                (defect_rate,)
             ))
         
         if quality_metrics.get('trend') == 'declining':
             new_alerts.append(self._create_alert(
                 line_id,
-                AlertSeverity.WARNING.value,
+                self._SEV_WARN,
                 "Quality Declining",
-                "Quality metrics show declining trend"
+                "Quality metrics show declining trend",
+                ()
             ))
         
-        self.alerts.extend(new_alerts)
         return new_alerts
     
-    def _create_alert(self, line_id: str, severity: str, title: str, message: str) -> Alert:
-        """Create a new alert"""
+    def _create_alert(self, line_id: str, severity: str, title: str,
+                      message_template: str, message_args: Tuple) -> Alert:
+        """Create a new alert; the message is formatted only when it is read"""
         self.alert_counter += 1
         alert = Alert(
-            alert_id=f"ALT-{self.alert_counter:05d}",
+            alert_id=self._id_prefix + str(self.alert_counter).zfill(5),
             line_id=line_id,
             severity=severity,
             title=title,
-            message=message,
-            timestamp=datetime.now().isoformat(),
+            message_template=message_template,
+            message_args=message_args,
+            timestamp_ns=time.time_ns(),
             acknowledged=False,
             resolved=False
         )
+        with self._alerts_lock:
+            if len(self.alerts) == self.alerts.maxlen:
+                self._evict_oldest_alert()
+            self.alerts.append(alert)
+            self._alerts_by_id[alert.alert_id] = alert
+            self._active_counts[severity] += 1
+            self.alerts_version += 1
         return alert
     
+    def _evict_oldest_alert(self):
+        """Drop the oldest alert and its index/count entries; caller holds _alerts_lock"""
+        alert = self.alerts.popleft()
+        del self._alerts_by_id[alert.alert_id]
+        if not alert.resolved:
+            self._active_counts[alert.severity] -= 1
+    
     def get_active_alerts(self) -> List[Dict]:
         """Get all active (unresolved) alerts"""
-        active = [alert for alert in self.alerts if not alert.resolved]
-        return [alert.to_dict() for alert in active]
+        cached_version, cached = self._active_alerts_cache
+        if cached_version == self.alerts_version:
+            return cached
+        version = self.alerts_version
+        # Iterate a copy: the background task appends to and evicts from the deque
+        active = [alert.to_dict() for alert in tuple(self.alerts) if not alert.resolved]
+        self._active_alerts_cache = (version, active)
+        return active
     
     def get_alert_counts(self) -> Dict[str, int]:
         """Get count of alerts by severity"""
-        active = [alert for alert in self.alerts if not alert.resolved]
-        return {
-            "critical": sum(1 for a in active if a.severity == AlertSeverity.CRITICAL.value),
-            "warning": sum(1 for a in active if a.severity == AlertSeverity.WARNING.value),
-            "info": sum(1 for a in active if a.severity == AlertSeverity.INFO.value)
-        }
+        return dict(self._active_counts)
     
     def acknowledge_alert(self, alert_id: str) -> bool:
         """Acknowledge an alert"""
-        for alert in self.alerts:
-            if alert.alert_id == alert_id:
+        with self._alerts_lock:
+            alert = self._alerts_by_id.get(alert_id)
+            if alert:
                 alert.acknowledged = True
+                alert.invalidate()
+                self.alerts_version += 1
                 return True
-        return False
+            return False
     
     def resolve_alert(self, alert_id: str) -> bool:
         """Resolve an alert"""
-        for alert in self.alerts:
-            if alert.alert_id == alert_id:
+        with self._alerts_lock:
+            alert = self._alerts_by_id.get(alert_id)
+            if alert:
+                if not alert.resolved:
+                    self._active_counts[alert.severity] -= 1
                 alert.resolved = True
+                alert.invalidate()
+                self.alerts_version += 1
                 return True
-        return False
+            return False
+    
+    def assess_machine_health_all(self, frame: SensorFrame, lines: List[ProductionLine],
+                                  tick_id: int) -> List[Dict]:
+        """Get machine health for all lines, reusing the result within a tick"""
+        cached_tick, cached = self._health_cache
+        if cached_tick == tick_id:
+            return cached
+        health_data = [health.to_dict() for health in self.assess_machine_health_batch(frame, lines)]
+        self._health_cache = (tick_id, health_data)
+        return health_data
     
     def assess_machine_health(self, line: ProductionLine) -> MachineHealth:
         """Assess overall machine health"""
-        health_score = 100.0
-        recommendations = []
+        return self.assess_machine_health_batch(SensorFrame.from_lines([line]), [line])[0]
+    
+    def assess_machine_health_batch(self, frame: SensorFrame, lines: List[ProductionLine]) -> List[MachineHealth]:
+        """Assess machine health for all lines from the vectorized health kernel"""
+        scores, temp_codes, pressure_codes, vibration_codes, low_efficiency, predicted_hours = \
+            self._health_kernel(frame)
         
-        # Temperature assessment
-        temp_status = "normal"
-        if line.temperature >= self.thresholds["temperature"]["critical"]:
-            temp_status = "critical"
-            health_score -= 30
-            recommendations.append("Immediate cooling system inspection required")
-        elif line.temperature >= self.thresholds["temperature"]["warning"]:
-            temp_status = "warning"
-            health_score -= 10
-            recommendations.append("Monitor cooling system")
+        health_list = []
+        for i, line in enumerate(lines):
+            temp_code = temp_codes[i]
+            pressure_code = pressure_codes[i]
+            vibration_code = vibration_codes[i]
+            
+            recommendations = []
+            if temp_code:
+                recommendations.append(_TEMP_RECOMMENDATIONS[temp_code])
+            if pressure_code:
+                recommendations.append(_PRESSURE_RECOMMENDATIONS[pressure_code])
+            if vibration_code:
+                recommendations.append(_VIBRATION_RECOMMENDATIONS[vibration_code])
+            if low_efficiency[i]:
+                recommendations.append("Performance optimization needed")
+            if not recommendations:
+                recommendations.append("All systems operating normally")
+            
+            health_list.append(MachineHealth(
+                line_id=line.line_id,
+                health_score=max(0, round(scores[i], 1)),
+                temperature_status=_STATUS_NAMES[temp_code],
+                pressure_status=_STATUS_NAMES[pressure_code],
+                vibration_status=_STATUS_NAMES[vibration_code],
+                predicted_maintenance_hours=predicted_hours[i],
+                recommendations=recommendations
+            ))
         
-        # Pressure assessment
-        pressure_status = "normal"
-        if line.pressure <= self.thresholds["pressure"]["critical_low"] or \
-           line.pressure >= self.thresholds["pressure"]["critical_high"]:
-            pressure_status = "critical"
-            health_score -= 30
-            recommendations.append("Critical pressure adjustment needed")
-        elif line.pressure <= self.thresholds["pressure"]["warning_low"] or \
-             line.pressure >= self.thresholds["pressure"]["warning_high"]:
-            pressure_status = "warning"
-            health_score -= 10
-            recommendations.append("Pressure calibration recommended")
+        return health_list
+    
+    def _health_kernel(self, frame: SensorFrame) -> Tuple[List, ...]:
+        """Compute health scores and status codes (0=normal, 1=warning, 2=critical) for all lines"""
+        temp_codes = np.where(frame.temp >= TEMP_CRIT, 2, (frame.temp >= TEMP_WARN).astype(np.int64))
         
-        # Vibration assessment
-        vibration_status = "normal"
-        if line.vibration >= self.thresholds["vibration"]["critical"]:
-            vibration_status = "critical"
-            health_score -= 35
-            recommendations.append("Immediate mechanical inspection required")
-        elif line.vibration >= self.thresholds["vibration"]["warning"]:
-            vibration_status = "warning"
-            health_score -= 15
-            recommendations.append("Schedule bearing inspection")
+        pressure_codes = np.where(
+            (frame.pressure <= PRESSURE_CRIT_LOW) | (frame.pressure >= PRESSURE_CRIT_HIGH), 2,
+            ((frame.pressure <= PRESSURE_WARN_LOW) | (frame.pressure >= PRESSURE_WARN_HIGH)).astype(np.int64)
+        )
         
-        # Efficiency impact
-        if line.efficiency < 80:
-            health_score -= 10
-            recommendations.append("Performance optimization needed")
+        vibration_codes = np.where(frame.vibration >= VIBRATION_CRIT, 2,
+                                   (frame.vibration >= VIBRATION_WARN).astype(np.int64))
         
-        # Predict maintenance hours (simplified model)
-        predicted_hours = int(200 - (100 - health_score) * 10)
-        predicted_hours = max(24, predicted_hours)
+        low_efficiency = frame.efficiency < 80
         
-        if not recommendations:
-            recommendations.append("All systems operating normally")
+        scores = (100.0
+                  - _TEMP_PENALTIES[temp_codes]
+                  - _PRESSURE_PENALTIES[pressure_codes]
+                  - _VIBRATION_PENALTIES[vibration_codes]
+                  - np.where(low_efficiency, 10.0, 0.0))
         
-        health = MachineHealth(
-            line_id=line.line_id,
-            health_score=max(0, round(health_score, 1)),
-            temperature_status=temp_status,
-            pressure_status=pressure_status,
-            vibration_status=vibration_status,
-            predicted_maintenance_hours=predicted_hours,
-            recommendations=recommendations
-        )
+        # Predict maintenance hours (simplified model)
+        predicted_hours = np.maximum(24, (200 - (100 - scores) * 10).astype(np.int64))
         
-        return health
+        return (scores.tolist(), temp_codes.tolist(), pressure_codes.tolist(),
+                vibration_codes.tolist(), low_efficiency.tolist(), predicted_hours.tolist())
@@ -4,9 +4,11 @@ Flask server with real-time WebSocket updates
 """
 
 from flask import Flask, render_template, jsonify, request, send_file
+from flask.json.provider import JSONProvider
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
-import threading
+import msgpack
+import orjson
 import time
 from datetime import datetime
 from production_monitor import ProductionMonitor
@@ -14,10 +16,47 @@ from quality_control import QualityControl
 from anomaly_detector import AnomalyDetector
 from report_generator import ReportGenerator
 
+
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class ORJSONCodec:
+    """json-module compatible orjson wrapper for Socket.IO packets"""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+
+def pack_update(payload):
+    """Encode a dashboard update as MessagePack for a binary Socket.IO frame"""
+    return msgpack.packb(payload, use_bin_type=True, default=_msgpack_default)
+
+
+def _msgpack_default(obj):
+    """Convert NumPy scalars, which msgpack cannot encode natively"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'factory-monitoring-secret-key'
+app.json = ORJSONProvider(app)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', json=ORJSONCodec)
 
 # Initialize monitoring systems
 production_monitor = ProductionMonitor()
@@ -25,36 +64,106 @@ quality_control = QualityControl()
 anomaly_detector = AnomalyDetector()
 report_generator = ReportGenerator()
 
-# Background thread for real-time updates
+# Background task for real-time updates
 update_thread = None
 update_thread_running = False
 
+# Last full dashboard payload, used to compute per-tick deltas
+last_snapshot = None
+
+# Seconds between production updates
+UPDATE_INTERVAL = 3.0
+
+# Maximum number of consecutive unchanged ticks to skip before emitting anyway
+MAX_SKIPPED_TICKS = 10
+
+
+def build_delta(previous, current):
+    """Build an update containing only the parts of the dashboard that changed"""
+    delta = {'delta': True}
+    
+    # Per-line collections: send only lines whose values moved
+    for key in ('production_lines', 'quality_metrics', 'machine_health'):
+        previous_by_line = {item['line_id']: item for item in previous[key]}
+        changed = [item for item in current[key] if previous_by_line.get(item['line_id']) != item]
+        if changed:
+            delta[key] = changed
+    
+    for key in ('overall_metrics', 'quality_summary', 'alert_counts'):
+        if current[key] != previous[key]:
+            delta[key] = current[key]
+    
+    # Alerts: send new alerts, alerts that changed in place (e.g. acknowledged)
+    # and the ids of alerts that are no longer active
+    if current['alerts'] is not previous['alerts']:
+        previous_by_id = {alert['alert_id']: alert for alert in previous['alerts']}
+        current_ids = {alert['alert_id'] for alert in current['alerts']}
+        new_alerts = []
+        changed_alerts = []
+        for alert in current['alerts']:
+            previous_alert = previous_by_id.get(alert['alert_id'])
+            if previous_alert is None:
+                new_alerts.append(alert)
+            elif previous_alert != alert:
+                changed_alerts.append(alert)
+        delta['new_alerts'] = new_alerts
+        delta['changed_alerts'] = changed_alerts
+        delta['removed_alert_ids'] = [alert_id for alert_id in previous_by_id if alert_id not in current_ids]
+    
+    return delta
+
+
+def sleep_until_next_tick(deadline):
+    """Sleep until the next tick deadline; if work overran it, restart the schedule from now"""
+    deadline += UPDATE_INTERVAL
+    remaining = deadline - time.monotonic()
+    if remaining > 0:
+        socketio.sleep(remaining)
+    else:
+        deadline = time.monotonic()
+    return deadline
+
 
 def background_update_task():
     """Background task to update production data and emit to clients"""
-    global update_thread_running
+    global update_thread_running, last_snapshot
+    
+    last_digest = None
+    skipped_ticks = 0
+    deadline = time.monotonic()
     
     while update_thread_running:
         # Update production data
         production_monitor.update_production_data()
         
-        # Get current data
-        production_lines = production_monitor.get_production_lines()
-        overall_metrics = production_monitor.get_overall_metrics()
-        quality_metrics = quality_control.get_all_quality_metrics(production_monitor.production_lines)
-        quality_summary = quality_control.get_quality_summary(production_monitor.production_lines)
+        # Skip detection and the emit when nothing moved since the last
+        # processed tick, but still publish periodically for liveness
+        digest = production_monitor.sensor_digest()
+        if digest == last_digest and skipped_ticks < MAX_SKIPPED_TICKS:
+            skipped_ticks += 1
+            deadline = sleep_until_next_tick(deadline)
+            continue
+        last_digest = digest
+        skipped_ticks = 0
         
         # Detect anomalies
-        new_alerts = []
-        machine_health_data = []
+        new_alerts = anomaly_detector.detect_anomalies_batch(
+            production_monitor.sensor_frame, production_monitor.production_lines
+        )
         
-        for line in production_monitor.production_lines:
-            alerts = anomaly_detector.detect_anomalies(line)
-            new_alerts.extend(alerts)
-            
-            # Get machine health
-            health = anomaly_detector.assess_machine_health(line)
-            machine_health_data.append(health.to_dict())
+        # Get current data
+        production_lines = production_monitor.get_production_lines()
+        overall_metrics = production_monitor.get_overall_metrics()
+        quality_summary = quality_control.get_quality_summary(
+            production_monitor.production_lines, production_monitor.tick_id
+        )
+        # Cached for this tick by the summary computed above
+        quality_metrics = quality_control.get_all_quality_metrics(
+            production_monitor.production_lines, production_monitor.tick_id
+        )
+        machine_health_data = anomaly_detector.assess_machine_health_all(
+            production_monitor.sensor_frame, production_monitor.production_lines, production_monitor.tick_id
+        )
         
         # Check quality anomalies
         for qm in quality_metrics:
@@ -66,8 +175,7 @@ def background_update_task():
         overall_metrics['critical_alerts'] = alert_counts['critical']
         overall_metrics['warning_alerts'] = alert_counts['warning']
         
-        # Emit updates to all connected clients
-        socketio.emit('production_update', {
+        snapshot = {
             'production_lines': production_lines,
             'overall_metrics': overall_metrics,
             'quality_metrics': quality_metrics,
@@ -75,10 +183,20 @@ def background_update_task():
             'alerts': anomaly_detector.get_active_alerts(),
             'alert_counts': alert_counts,
             'machine_health': machine_health_data
-        })
+        }
+        
+        # Emit only what changed since the previous tick; clients get a full
+        # snapshot when they connect. Publish the new snapshot before emitting
+        # so a client connecting in between never misses this delta.
+        previous_snapshot = last_snapshot
+        last_snapshot = snapshot
+        if previous_snapshot is None:
+            socketio.emit('production_update', pack_update(snapshot))
+        else:
+            socketio.emit('production_update', pack_update(build_delta(previous_snapshot, snapshot)))
         
-        # Update every 3 seconds
-        time.sleep(3)
+        # Update on a fixed cadence regardless of how long this tick took
+        deadline = sleep_until_next_tick(deadline)
 
 
 @app.route('/')
@@ -115,14 +233,18 @@ def get_overall_metrics():
 @app.route('/api/quality-metrics')
 def get_quality_metrics():
     """Get quality metrics for all lines"""
-    metrics = quality_control.get_all_quality_metrics(production_monitor.production_lines)
+    metrics = quality_control.get_all_quality_metrics(
+        production_monitor.production_lines, production_monitor.tick_id
+    )
     return jsonify(metrics)
 
 
 @app.route('/api/quality-summary')
 def get_quality_summary():
     """Get overall quality summary"""
-    summary = quality_control.get_quality_summary(production_monitor.production_lines)
+    summary = quality_control.get_quality_summary(
+        production_monitor.production_lines, production_monitor.tick_id
+    )
     return jsonify(summary)
 
 
@@ -153,10 +275,9 @@ def resolve_alert(alert_id):
 @app.route('/api/machine-health')
 def get_machine_health():
     """Get machine health for all lines"""
-    health_data = []
-    for line in production_monitor.production_lines:
-        health = anomaly_detector.assess_machine_health(line)
-        health_data.append(health.to_dict())
+    health_data = anomaly_detector.assess_machine_health_all(
+        production_monitor.sensor_frame, production_monitor.production_lines, production_monitor.tick_id
+    )
     return jsonify(health_data)
 
 
@@ -196,7 +317,9 @@ def get_analytics():
             }
             for line in production_lines
         ],
-        "quality_by_line": quality_control.get_all_quality_metrics(production_lines)
+        "quality_by_line": quality_control.get_all_quality_metrics(
+            production_lines, production_monitor.tick_id
+        )
     }
     
     return jsonify(analytics)
@@ -206,7 +329,9 @@ def get_analytics():
 def export_pdf():
     """Export production report as PDF"""
     production_lines = production_monitor.get_production_lines()
-    quality_metrics = quality_control.get_all_quality_metrics(production_monitor.production_lines)
+    quality_metrics = quality_control.get_all_quality_metrics(
+        production_monitor.production_lines, production_monitor.tick_id
+    )
     overall_metrics = production_monitor.get_overall_metrics()
     alert_counts = anomaly_detector.get_alert_counts()
     overall_metrics['critical_alerts'] = alert_counts['critical']
@@ -214,7 +339,8 @@ def export_pdf():
     alerts = anomaly_detector.get_active_alerts()
     
     pdf_buffer = report_generator.generate_pdf_report(
-        production_lines, quality_metrics, overall_metrics, alerts
+        production_lines, quality_metrics, overall_metrics, alerts,
+        cache_key=(production_monitor.tick_id, anomaly_detector.alerts_version)
     )
     
     return send_file(
@@ -229,7 +355,9 @@ def export_pdf():
 def export_excel():
     """Export production report as Excel"""
     production_lines = production_monitor.get_production_lines()
-    quality_metrics = quality_control.get_all_quality_metrics(production_monitor.production_lines)
+    quality_metrics = quality_control.get_all_quality_metrics(
+        production_monitor.production_lines, production_monitor.tick_id
+    )
     overall_metrics = production_monitor.get_overall_metrics()
     alert_counts = anomaly_detector.get_alert_counts()
     overall_metrics['critical_alerts'] = alert_counts['critical']
@@ -237,7 +365,8 @@ def export_excel():
     alerts = anomaly_detector.get_active_alerts()
     
     excel_buffer = report_generator.generate_excel_report(
-        production_lines, quality_metrics, overall_metrics, alerts
+        production_lines, quality_metrics, overall_metrics, alerts,
+        cache_key=(production_monitor.tick_id, anomaly_detector.alerts_version)
     )
     
     return send_file(
@@ -258,21 +387,28 @@ def handle_connect():
     # Start background update thread if not running
     if update_thread is None or not update_thread_running:
         update_thread_running = True
-        update_thread = threading.Thread(target=background_update_task)
-        update_thread.daemon = True
-        update_thread.start()
+        update_thread = socketio.start_background_task(background_update_task)
+    
+    # Send initial data, reusing the running task's latest snapshot when there is one
+    if last_snapshot is not None:
+        emit('production_update', pack_update(last_snapshot))
+        return
     
-    # Send initial data
-    emit('production_update', {
+    emit('production_update', pack_update({
         'production_lines': production_monitor.get_production_lines(),
         'overall_metrics': production_monitor.get_overall_metrics(),
-        'quality_metrics': quality_control.get_all_quality_metrics(production_monitor.production_lines),
-        'quality_summary': quality_control.get_quality_summary(production_monitor.production_lines),
+        'quality_metrics': quality_control.get_all_quality_metrics(
+            production_monitor.production_lines, production_monitor.tick_id
+        ),
+        'quality_summary': quality_control.get_quality_summary(
+            production_monitor.production_lines, production_monitor.tick_id
+        ),
         'alerts': anomaly_detector.get_active_alerts(),
         'alert_counts': anomaly_detector.get_alert_counts(),
-        'machine_health': [anomaly_detector.assess_machine_health(line).to_dict() 
-                          for line in production_monitor.production_lines]
-    })
+        'machine_health': anomaly_detector.assess_machine_health_all(
+            production_monitor.sensor_frame, production_monitor.production_lines, production_monitor.tick_id
+        )
+    }))
 
 
 @socketio.on('disconnect')
@@ -3,10 +3,11 @@ Data models for Factory Process Monitoring Agent
 Defines data structures for production lines, quality metrics, and alerts
 """
 
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from enum import Enum
+import numpy as np
 
 
 class LineStatus(Enum):
@@ -24,7 +25,7 @@ class AlertSeverity(Enum):
     INFO = "info"
 
 
-@dataclass
+@dataclass(slots=True)
 class ProductionLine:
     """Production line data model"""
     line_id: str
@@ -40,13 +41,35 @@ class ProductionLine:
     products_produced: int
     defects: int
     last_maintenance: str
+    # Serialized form, cleared through invalidate() whenever the line changes
+    _cached_dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    
+    def invalidate(self):
+        """Drop the cached dict after the line's values have been updated"""
+        self._cached_dict = None
     
     def to_dict(self) -> Dict:
-        """Convert to dictionary"""
-        return asdict(self)
+        """Convert to dictionary, reusing the cached dict until the line changes"""
+        if self._cached_dict is None:
+            self._cached_dict = {
+                "line_id": self.line_id,
+                "name": self.name,
+                "status": self.status,
+                "current_speed": self.current_speed,
+                "target_speed": self.target_speed,
+                "efficiency": self.efficiency,
+                "uptime": self.uptime,
+                "temperature": self.temperature,
+                "pressure": self.pressure,
+                "vibration": self.vibration,
+                "products_produced": self.products_produced,
+                "defects": self.defects,
+                "last_maintenance": self.last_maintenance
+            }
+        return self._cached_dict
 
 
-@dataclass
+@dataclass(slots=True)
 class QualityMetrics:
     """Quality control metrics"""
     line_id: str
@@ -60,27 +83,64 @@ class QualityMetrics:
     
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            "line_id": self.line_id,
+            "total_inspected": self.total_inspected,
+            "passed": self.passed,
+            "failed": self.failed,
+            "defect_rate": self.defect_rate,
+            "defect_types": self.defect_types,
+            "average_quality_score": self.average_quality_score,
+            "trend": self.trend
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class Alert:
     """Alert/notification model"""
     alert_id: str
     line_id: str
     severity: str
     title: str
-    message: str
-    timestamp: str
+    message_template: str
+    message_args: Tuple
+    timestamp_ns: int  # epoch nanoseconds, formatted lazily
     acknowledged: bool = False
     resolved: bool = False
+    # Rendered form, cleared through invalidate() whenever the alert changes state
+    _cached_dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def message(self) -> str:
+        """Alert message, formatted from its template on demand"""
+        return self.message_template.format(*self.message_args)
+    
+    @property
+    def timestamp(self) -> str:
+        """ISO 8601 timestamp in local time"""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9).isoformat()
+    
+    def invalidate(self):
+        """Drop the cached dict after the alert has been acknowledged or resolved"""
+        self._cached_dict = None
     
     def to_dict(self) -> Dict:
-        """Convert to dictionary"""
-        return asdict(self)
+        """Convert to dictionary, formatting message and timestamp only once"""
+        if self._cached_dict is None:
+            self._cached_dict = {
+                "alert_id": self.alert_id,
+                "line_id": self.line_id,
+                "severity": self.severity,
+                "title": self.title,
+                "message": self.message,
+                "timestamp": self.timestamp,
+                "acknowledged": self.acknowledged,
+                "resolved": self.resolved
+            }
+        return self._cached_dict
 
 
-@dataclass
+@dataclass(slots=True)
 class ProductionMetrics:
     """Overall production metrics"""
     total_output: int
@@ -94,10 +154,19 @@ class ProductionMetrics:
     
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            "total_output": self.total_output,
+            "total_defects": self.total_defects,
+            "overall_oee": self.overall_oee,
+            "average_efficiency": self.average_efficiency,
+            "active_lines": self.active_lines,
+            "total_lines": self.total_lines,
+            "critical_alerts": self.critical_alerts,
+            "warning_alerts": self.warning_alerts
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class MachineHealth:
     """Machine health monitoring data"""
     line_id: str
@@ -110,4 +179,31 @@ class MachineHealth:
     
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            "line_id": self.line_id,
+            "health_score": self.health_score,
+            "temperature_status": self.temperature_status,
+            "pressure_status": self.pressure_status,
+            "vibration_status": self.vibration_status,
+            "predicted_maintenance_hours": self.predicted_maintenance_hours,
+            "recommendations": self.recommendations
+        }
+
+
+@dataclass(slots=True)
+class SensorFrame:
+    """Per-line sensor readings stored as NumPy arrays aligned by line index"""
+    temp: np.ndarray  # celsius
+    pressure: np.ndarray  # bar
+    vibration: np.ndarray  # mm/s
+    efficiency: np.ndarray  # percentage
+
+    @classmethod
+    def from_lines(cls, lines: List[ProductionLine]) -> "SensorFrame":
+        """Build a frame from the current readings of the given lines"""
+        return cls(
+            temp=np.array([line.temperature for line in lines], dtype=np.float64),
+            pressure=np.array([line.pressure for line in lines], dtype=np.float64),
+            vibration=np.array([line.vibration for line in lines], dtype=np.float64),
+            efficiency=np.array([line.efficiency for line in lines], dtype=np.float64)
+        )
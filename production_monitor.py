@@ -3,45 +3,88 @@ Production Line Monitor
 Simulates and monitors production line data with realistic metrics
 """
 
-import random
 import time
+import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict
-from data_models import ProductionLine, LineStatus, ProductionMetrics
+from data_models import ProductionLine, LineStatus, ProductionMetrics, SensorFrame
+import simulation_kernel
+
+
+# Line status values, bound once instead of going through the enum each time
+_RUNNING = LineStatus.RUNNING.value
+_IDLE = LineStatus.IDLE.value
+_MAINT = LineStatus.MAINTENANCE.value
+_ERROR = LineStatus.ERROR.value
+
+# Mapping between line status strings and simulation kernel status codes
+_STATUS_CODE = {
+    _RUNNING: simulation_kernel.RUNNING,
+    _IDLE: simulation_kernel.IDLE,
+    _MAINT: simulation_kernel.MAINTENANCE,
+    _ERROR: simulation_kernel.ERROR
+}
+_STATUS_NAME = {code: name for name, code in _STATUS_CODE.items()}
 
 
 class ProductionMonitor:
     """Manages production line monitoring and simulation"""
     
     def __init__(self):
+        self._rng = np.random.default_rng()
         self.production_lines = self._initialize_lines()
+        self._line_index = {line.line_id: line for line in self.production_lines}
+        self.sensor_frame = SensorFrame.from_lines(self.production_lines)
         self.start_time = datetime.now()
+        self.tick_id = 0  # incremented on every simulation update
+        # Refilled in place with the uniform draws for each tick
+        self._rand_u = np.empty((len(self.production_lines), simulation_kernel.RAND_COLUMNS))
+        
+        # Structure-of-arrays simulation state, aligned by line index. The
+        # sensor arrays are shared with sensor_frame and updated in place.
+        lines = self.production_lines
+        self._speed = np.array([line.current_speed for line in lines], dtype=np.float64)
+        self._target = np.array([line.target_speed for line in lines], dtype=np.float64)
+        self._uptime = np.array([line.uptime for line in lines], dtype=np.float64)
+        self._produced = np.array([line.products_produced for line in lines], dtype=np.int64)
+        self._defects = np.array([line.defects for line in lines], dtype=np.int64)
+        self._eff = self.sensor_frame.efficiency
+        self._temp = self.sensor_frame.temp
+        self._pres = self.sensor_frame.pressure
+        self._vib = self.sensor_frame.vibration
+        # Status codes are the source of truth; line.status mirrors them as strings
+        self._status_code = np.array([_STATUS_CODE[line.status] for line in lines], dtype=np.int8)
+        
+        # Totals for get_overall_metrics, refreshed once per tick
+        self._update_totals()
         
     def _initialize_lines(self) -> List[ProductionLine]:
         """Initialize production lines with default values"""
         lines = []
+        rng = self._rng
         line_configs = [
             {"id": "LINE-A1", "name": "Assembly Line A1", "target": 120.0},
             {"id": "LINE-A2", "name": "Assembly Line A2", "target": 120.0},
             {"id": "LINE-B1", "name": "Packaging Line B1", "target": 200.0},
             {"id": "LINE-C1", "name": "Quality Check C1", "target": 150.0},
         ]
+        now = datetime.now()
         
         for config in line_configs:
             line = ProductionLine(
                 line_id=config["id"],
                 name=config["name"],
-                status=LineStatus.RUNNING.value,
-                current_speed=config["target"] * random.uniform(0.85, 1.0),
+                status=_RUNNING,
+                current_speed=config["target"] * float(rng.uniform(0.85, 1.0)),
                 target_speed=config["target"],
-                efficiency=random.uniform(85, 98),
-                uptime=random.uniform(92, 99),
-                temperature=random.uniform(20, 35),
-                pressure=random.uniform(5.5, 6.5),
-                vibration=random.uniform(0.5, 2.0),
-                products_produced=random.randint(5000, 15000),
-                defects=random.randint(50, 200),
-                last_maintenance=(datetime.now() - timedelta(days=random.randint(1, 30))).strftime("%Y-%m-%d")
+                efficiency=float(rng.uniform(85, 98)),
+                uptime=float(rng.uniform(92, 99)),
+                temperature=float(rng.uniform(20, 35)),
+                pressure=float(rng.uniform(5.5, 6.5)),
+                vibration=float(rng.uniform(0.5, 2.0)),
+                products_produced=int(rng.integers(5000, 15000, endpoint=True)),
+                defects=int(rng.integers(50, 200, endpoint=True)),
+                last_maintenance=(now - timedelta(days=int(rng.integers(1, 30, endpoint=True)))).strftime("%Y-%m-%d")
             )
             lines.append(line)
         
@@ -49,64 +92,66 @@ class ProductionMonitor:
     
     def update_production_data(self):
         """Update production line data with realistic variations"""
-        for line in self.production_lines:
-            # Simulate realistic variations
-            if line.status == LineStatus.RUNNING.value:
-                # Speed variation
-                speed_change = random.uniform(-5, 5)
-                line.current_speed = max(0, min(line.target_speed * 1.1, 
-                                                line.current_speed + speed_change))
-                
-                # Efficiency calculation
-                line.efficiency = (line.current_speed / line.target_speed) * 100
-                line.efficiency = max(70, min(100, line.efficiency + random.uniform(-2, 2)))
-                
-                # Environmental parameters
-                line.temperature += random.uniform(-1, 1)
-                line.temperature = max(18, min(45, line.temperature))
-                
-                line.pressure += random.uniform(-0.2, 0.2)
-                line.pressure = max(5.0, min(7.0, line.pressure))
-                
-                line.vibration += random.uniform(-0.3, 0.3)
-                line.vibration = max(0.3, min(4.0, line.vibration))
-                
-                # Production counts
-                units_produced = int(line.current_speed / 60 * 5)  # 5 second intervals
-                line.products_produced += units_produced
-                
-                # Defect simulation (higher chance with worse conditions)
-                defect_probability = 0.02
-                if line.temperature > 38:
-                    defect_probability += 0.03
-                if line.vibration > 3.0:
-                    defect_probability += 0.02
-                if line.efficiency < 80:
-                    defect_probability += 0.02
-                    
-                if random.random() < defect_probability:
-                    line.defects += random.randint(1, 3)
-                
-                # Random status changes (rare)
-                if random.random() < 0.01:  # 1% chance
-                    line.status = random.choice([
-                        LineStatus.RUNNING.value,
-                        LineStatus.IDLE.value,
-                        LineStatus.MAINTENANCE.value
-                    ])
-            
-            elif line.status == LineStatus.IDLE.value:
-                line.current_speed = 0
-                # Chance to resume
-                if random.random() < 0.3:
-                    line.status = LineStatus.RUNNING.value
-                    
-            elif line.status == LineStatus.MAINTENANCE.value:
-                line.current_speed = 0
-                # Chance to complete maintenance
-                if random.random() < 0.1:
-                    line.status = LineStatus.RUNNING.value
-                    line.last_maintenance = datetime.now().strftime("%Y-%m-%d")
+        lines = self.production_lines
+        
+        status = self._status_code
+        previous_status = status.copy()
+        rand_u = self._rng.random(out=self._rand_u)
+        
+        completed = simulation_kernel.step(
+            self._speed, self._eff, self._temp, self._pres, self._vib, self._target,
+            status, self._produced, self._defects, rand_u
+        )
+        
+        for i in np.flatnonzero(status != previous_status).tolist():
+            lines[i].status = _STATUS_NAME[int(status[i])]
+        # Every completion in a tick shares one date, formatted only if needed
+        today_str = None
+        for i in np.flatnonzero(completed).tolist():
+            if today_str is None:
+                today_str = datetime.now().strftime("%Y-%m-%d")
+            lines[i].last_maintenance = today_str
+        
+        self._sync_lines()
+        self._update_totals()
+        # Publish the new tick only once its data is fully written, so the
+        # per-tick caches never store pre-update values under the new id
+        self.tick_id += 1
+    
+    def _update_totals(self):
+        """Recompute the overall-metrics totals with one array reduction each"""
+        self._totals = {
+            'output': int(self._produced.sum()),
+            'defects': int(self._defects.sum()),
+            'avg_efficiency': float(self._eff.mean()),
+            'avg_uptime': float(self._uptime.mean()),
+            'running': int(np.count_nonzero(self._status_code == simulation_kernel.RUNNING))
+        }
+    
+    def _sync_lines(self):
+        """Copy the array state back onto the ProductionLine objects"""
+        for line, speed, efficiency, temperature, pressure, vibration, produced, defects in zip(
+                self.production_lines, self._speed.tolist(), self._eff.tolist(), self._temp.tolist(),
+                self._pres.tolist(), self._vib.tolist(), self._produced.tolist(), self._defects.tolist()):
+            line.current_speed = speed
+            line.efficiency = efficiency
+            line.temperature = temperature
+            line.pressure = pressure
+            line.vibration = vibration
+            line.products_produced = produced
+            line.defects = defects
+            line.invalidate()
+    
+    def sensor_digest(self) -> int:
+        """Get a cheap fingerprint of sensor readings and line statuses"""
+        frame = self.sensor_frame
+        return hash((
+            frame.temp.tobytes(),
+            frame.pressure.tobytes(),
+            frame.vibration.tobytes(),
+            frame.efficiency.tobytes(),
+            self._status_code.tobytes()
+        ))
     
     def get_production_lines(self) -> List[Dict]:
         """Get current production line data"""
@@ -114,25 +159,23 @@ class ProductionMonitor:
     
     def get_line_by_id(self, line_id: str) -> ProductionLine:
         """Get specific production line by ID"""
-        for line in self.production_lines:
-            if line.line_id == line_id:
-                return line
-        return None
+        return self._line_index.get(line_id)
     
     def get_overall_metrics(self) -> Dict:
         """Calculate overall production metrics"""
-        total_output = sum(line.products_produced for line in self.production_lines)
-        total_defects = sum(line.defects for line in self.production_lines)
-        avg_efficiency = sum(line.efficiency for line in self.production_lines) / len(self.production_lines)
+        totals = self._totals
+        total_output = totals['output']
+        total_defects = totals['defects']
+        avg_efficiency = totals['avg_efficiency']
         
         # Calculate OEE (Overall Equipment Effectiveness)
         # OEE = Availability × Performance × Quality
-        avg_uptime = sum(line.uptime for line in self.production_lines) / len(self.production_lines)
+        avg_uptime = totals['avg_uptime']
         avg_performance = avg_efficiency
         quality_rate = ((total_output - total_defects) / total_output * 100) if total_output > 0 else 100
         oee = (avg_uptime / 100) * (avg_performance / 100) * (quality_rate / 100) * 100
         
-        active_lines = sum(1 for line in self.production_lines if line.status == LineStatus.RUNNING.value)
+        active_lines = totals['running']
         
         metrics = ProductionMetrics(
             total_output=total_output,
@@ -4,10 +4,17 @@ Manages quality metrics, defect tracking, and quality analysis
 """
 
 import random
-from typing import Dict, List
+import numpy as np
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
 from data_models import QualityMetrics, ProductionLine
 
 
+# Defect-rate change between reading pairs that counts as a trend
+IMPROVING_RATIO = 0.9
+DECLINING_RATIO = 1.1
+
+
 class QualityControl:
     """Quality control and analysis system"""
     
@@ -19,7 +26,13 @@ class QualityControl:
             "Material Defect",
             "Packaging Error"
         ]
+        # Share of defects per category; the last category takes the remainder
+        self._weights_head = np.array([0.35, 0.25, 0.20, 0.15])
+        self._zero_distribution = {category: 0 for category in self.defect_categories}
         self.historical_defect_rates = {}
+        self._analysis_cache: Tuple[int, List[QualityMetrics]] = (-1, [])
+        self._metrics_cache: Tuple[int, List[Dict]] = (-1, [])
+        self._summary_cache: Tuple[int, Dict] = (-1, {})
     
     def analyze_quality(self, line: ProductionLine) -> QualityMetrics:
         """Analyze quality metrics for a production line"""
@@ -51,84 +64,135 @@ class QualityControl:
         
         return metrics
     
-    def _generate_defect_distribution(self, total_defects: int) -> Dict[str, int]:
-        """Generate realistic defect type distribution"""
-        if total_defects == 0:
-            return {category: 0 for category in self.defect_categories}
+    def analyze_quality_batch(self, lines: List[ProductionLine]) -> List[QualityMetrics]:
+        """Analyze quality metrics for all production lines with vectorized arithmetic"""
+        count = len(lines)
+        total_inspected = np.fromiter((line.products_produced for line in lines), dtype=np.int64, count=count)
+        failed = np.fromiter((line.defects for line in lines), dtype=np.int64, count=count)
+        
+        defect_rates = np.divide(failed, total_inspected, out=np.zeros(count),
+                                 where=total_inspected > 0) * 100
         
-        distribution = {}
-        remaining = total_defects
+        # Calculate quality scores (0-100)
+        quality_scores = np.maximum(0, 100 - defect_rates * 10)
         
-        # Weighted distribution (some defects more common than others)
-        weights = [0.35, 0.25, 0.20, 0.15, 0.05]
+        # Defect type distribution: weighted split plus a remainder column
+        head_counts = np.outer(failed, self._weights_head).astype(np.int64)
+        tail_counts = np.maximum(0, failed - head_counts.sum(axis=1))
         
-        for i, category in enumerate(self.defect_categories[:-1]):
-            count = int(total_defects * weights[i])
-            distribution[category] = count
-            remaining -= count
+        metrics = []
+        for line, inspected, line_failed, defect_rate, quality_score, head, tail in zip(
+                lines, total_inspected.tolist(), failed.tolist(), defect_rates.tolist(),
+                quality_scores.tolist(), head_counts.tolist(), tail_counts.tolist()):
+            metrics.append(QualityMetrics(
+                line_id=line.line_id,
+                total_inspected=inspected,
+                passed=inspected - line_failed,
+                failed=line_failed,
+                defect_rate=round(defect_rate, 2),
+                defect_types=dict(zip(self.defect_categories, head + [tail])),
+                average_quality_score=round(quality_score, 2),
+                trend=self._calculate_trend(line.line_id, defect_rate)
+            ))
+        
+        return metrics
+    
+    def _generate_defect_distribution(self, total_defects: int) -> Dict[str, int]:
+        """Generate realistic defect type distribution"""
+        if total_defects == 0:
+            return self._zero_distribution
         
-        # Assign remaining to last category
-        distribution[self.defect_categories[-1]] = max(0, remaining)
+        # Weighted distribution (some defects more common than others);
+        # the last category gets whatever remains
+        head = (total_defects * self._weights_head).astype(np.int64).tolist()
+        tail = max(0, total_defects - sum(head))
         
-        return distribution
+        return dict(zip(self.defect_categories, head + [tail]))
     
     def _calculate_trend(self, line_id: str, current_rate: float) -> str:
         """Calculate quality trend based on historical data"""
-        if line_id not in self.historical_defect_rates:
-            self.historical_defect_rates[line_id] = []
-        
-        history = self.historical_defect_rates[line_id]
+        history = self.historical_defect_rates.get(line_id)
+        if history is None:
+            # Keep last 10 readings
+            history = self.historical_defect_rates[line_id] = deque(maxlen=10)
         history.append(current_rate)
         
-        # Keep last 10 readings
-        if len(history) > 10:
-            history.pop(0)
-        
         if len(history) < 3:
             return "stable"
         
-        # Calculate trend from last 5 readings
-        recent = history[-5:]
-        avg_old = sum(recent[:2]) / 2
-        avg_new = sum(recent[-2:]) / 2
+        # Compare the oldest and newest pairs of the last 5 readings; pair
+        # sums are compared directly since both averages divide by two
+        start = max(0, len(history) - 5)
+        old_sum = history[start] + history[start + 1]
+        new_sum = history[-2] + history[-1]
         
-        if avg_new < avg_old * 0.9:
+        if new_sum < old_sum * IMPROVING_RATIO:
             return "improving"
-        elif avg_new > avg_old * 1.1:
+        elif new_sum > old_sum * DECLINING_RATIO:
             return "declining"
         else:
             return "stable"
     
-    def get_all_quality_metrics(self, production_lines: List[ProductionLine]) -> List[Dict]:
-        """Get quality metrics for all production lines"""
-        metrics = []
-        for line in production_lines:
-            quality_metrics = self.analyze_quality(line)
-            metrics.append(quality_metrics.to_dict())
+    def _analyze_all(self, production_lines: List[ProductionLine],
+                     tick_id: Optional[int] = None) -> List[QualityMetrics]:
+        """Analyze quality for all production lines, reusing the result within a tick"""
+        if tick_id is not None and self._analysis_cache[0] == tick_id:
+            return self._analysis_cache[1]
+        
+        metrics = self.analyze_quality_batch(production_lines)
+        
+        if tick_id is not None:
+            self._analysis_cache = (tick_id, metrics)
         return metrics
     
-    def get_quality_summary(self, production_lines: List[ProductionLine]) -> Dict:
-        """Get overall quality summary"""
-        all_metrics = self.get_all_quality_metrics(production_lines)
-        
-        total_inspected = sum(m['total_inspected'] for m in all_metrics)
-        total_failed = sum(m['failed'] for m in all_metrics)
+    def get_all_quality_metrics(self, production_lines: List[ProductionLine],
+                                tick_id: Optional[int] = None) -> List[Dict]:
+        """Get quality metrics for all production lines, reusing the result within a tick"""
+        if tick_id is not None and self._metrics_cache[0] == tick_id:
+            return self._metrics_cache[1]
         
-        overall_defect_rate = (total_failed / total_inspected * 100) if total_inspected > 0 else 0
-        avg_quality_score = sum(m['average_quality_score'] for m in all_metrics) / len(all_metrics) if all_metrics else 0
+        metrics = [quality_metrics.to_dict() for quality_metrics in self._analyze_all(production_lines, tick_id)]
         
-        # Aggregate defect types
-        all_defect_types = {}
+        if tick_id is not None:
+            self._metrics_cache = (tick_id, metrics)
+        return metrics
+    
+    def get_quality_summary(self, production_lines: List[ProductionLine],
+                            tick_id: Optional[int] = None) -> Dict:
+        """Get overall quality summary, reusing the result within a tick"""
+        if tick_id is not None and self._summary_cache[0] == tick_id:
+            return self._summary_cache[1]
+        
+        all_metrics = self._analyze_all(production_lines, tick_id)
+        
+        # Aggregate totals and defect types in a single pass; at the handful
+        # of lines monitored this beats gathering columns for NumPy reductions
+        total_inspected = 0
+        total_failed = 0
+        quality_score_sum = 0.0
+        lines_with_issues = 0
+        all_defect_types = Counter()
         for metrics in all_metrics:
-            for defect_type, count in metrics['defect_types'].items():
-                all_defect_types[defect_type] = all_defect_types.get(defect_type, 0) + count
+            total_inspected += metrics.total_inspected
+            total_failed += metrics.failed
+            quality_score_sum += metrics.average_quality_score
+            if metrics.defect_rate > 5.0:
+                lines_with_issues += 1
+            all_defect_types.update(metrics.defect_types)
         
-        return {
+        overall_defect_rate = (total_failed / total_inspected * 100) if total_inspected > 0 else 0
+        avg_quality_score = quality_score_sum / len(all_metrics) if all_metrics else 0
+        
+        summary = {
             "total_inspected": total_inspected,
             "total_passed": total_inspected - total_failed,
             "total_failed": total_failed,
             "overall_defect_rate": round(overall_defect_rate, 2),
             "average_quality_score": round(avg_quality_score, 2),
-            "defect_distribution": all_defect_types,
-            "lines_with_issues": sum(1 for m in all_metrics if m['defect_rate'] > 5.0)
+            "defect_distribution": dict(all_defect_types),
+            "lines_with_issues": lines_with_issues
         }
+        
+        if tick_id is not None:
+            self._summary_cache = (tick_id, summary)
+        return summary
@@ -5,16 +5,104 @@ Generates PDF and Excel reports for production data
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
 import io
+from operator import itemgetter
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
+
+
+def _header_table_style(align: str, header_font_size: int = 10) -> TableStyle:
+    """Build the shared PDF table style with a highlighted header row"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+
+# Report styles are immutable value objects, so build them once and share them
+SUMMARY_TABLE_STYLE = _header_table_style('LEFT', header_font_size=12)
+CENTERED_TABLE_STYLE = _header_table_style('CENTER')
+LEFT_ALIGNED_TABLE_STYLE = _header_table_style('LEFT')
+
+
+def _shorten(s: str, n: int = 50) -> str:
+    """Truncate s to n characters, marking the cut with an ellipsis"""
+    return s if len(s) <= n else s[:n] + '...'
+
+
+def _table_rows(header: List[str], records, fields, formatters) -> List[List[str]]:
+    """Build header plus formatted rows, filling a list sized up front"""
+    rows = [header] + [None] * len(records)
+    for i, record in enumerate(records, 1):
+        rows[i] = [fmt(value) for fmt, value in zip(formatters, fields(record))]
+    return rows
+
+
+# PDF table rows: field getter plus one formatter per extracted field
+PDF_LINE_ROW = (
+    itemgetter('line_id', 'status', 'current_speed', 'efficiency', 'products_produced', 'defects'),
+    (str, str.upper, "{:.0f} u/min".format, "{:.1f}%".format, "{:,}".format, str)
+)
+PDF_QUALITY_ROW = (
+    itemgetter('line_id', 'total_inspected', 'passed', 'failed', 'defect_rate', 'average_quality_score'),
+    (str, "{:,}".format, "{:,}".format, "{:,}".format, "{:.2f}%".format, "{:.1f}".format)
+)
+PDF_ALERT_ROW = (
+    itemgetter('severity', 'line_id', 'title', 'message'),
+    (str.upper, str, str, _shorten)
+)
+
+
+HEADER_FORMAT = {
+    'bold': True,
+    'font_color': '#FFFFFF',
+    'font_size': 12,
+    'bg_color': '#667eea',
+    'align': 'center',
+    'valign': 'vcenter',
+    'border': 1
+}
+
+# Excel sheet columns: source dict key -> header
+LINE_COLUMNS = {
+    'line_id': "Line ID",
+    'name': "Name",
+    'status': "Status",
+    'current_speed': "Current Speed",
+    'target_speed': "Target Speed",
+    'efficiency': "Efficiency (%)",
+    'uptime': "Uptime (%)",
+    'products_produced': "Products Produced",
+    'defects': "Defects"
+}
+QUALITY_COLUMNS = {
+    'line_id': "Line ID",
+    'total_inspected': "Total Inspected",
+    'passed': "Passed",
+    'failed': "Failed",
+    'defect_rate': "Defect Rate (%)",
+    'average_quality_score': "Quality Score",
+    'trend': "Trend"
+}
+ALERT_COLUMNS = {
+    'alert_id': "Alert ID",
+    'line_id': "Line ID",
+    'severity': "Severity",
+    'title': "Title",
+    'message': "Message",
+    'timestamp': "Timestamp"
+}
 
 
 class ReportGenerator:
@@ -38,9 +126,29 @@ class ReportGenerator:
             spaceAfter=12,
             spaceBefore=12
         )
+        # Latest rendered report per format, keyed by the caller's data version
+        self._report_cache: Dict[str, Tuple[Hashable, bytes]] = {}
+    
+    def _get_cached_report(self, report_format: str, cache_key: Optional[Hashable]) -> Optional[io.BytesIO]:
+        """Return a fresh buffer over a cached report if it was rendered for cache_key"""
+        if cache_key is None:
+            return None
+        cached = self._report_cache.get(report_format)
+        if cached and cached[0] == cache_key:
+            return io.BytesIO(cached[1])
+        return None
+    
+    def _store_report(self, report_format: str, cache_key: Optional[Hashable], buffer: io.BytesIO):
+        """Remember a rendered report, replacing any older one of the same format"""
+        if cache_key is not None:
+            self._report_cache[report_format] = (cache_key, buffer.getvalue())
     
-    def generate_pdf_report(self, production_lines, quality_metrics, overall_metrics, alerts):
-        """Generate a comprehensive PDF report"""
+    def generate_pdf_report(self, production_lines, quality_metrics, overall_metrics, alerts, cache_key=None):
+        """Generate a comprehensive PDF report, reusing the last one rendered for cache_key"""
+        cached = self._get_cached_report('pdf', cache_key)
+        if cached:
+            return cached
+        
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72,
                                topMargin=72, bottomMargin=18)
@@ -73,72 +181,29 @@ class ReportGenerator:
         ]
         
         overall_table = Table(overall_data, colWidths=[3*inch, 3*inch])
-        overall_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        overall_table.setStyle(SUMMARY_TABLE_STYLE)
         elements.append(overall_table)
         elements.append(Spacer(1, 20))
         
         # Production Lines Section
         elements.append(Paragraph("Production Lines Status", self.heading_style))
         
-        line_data = [['Line ID', 'Status', 'Speed', 'Efficiency', 'Output', 'Defects']]
-        for line in production_lines:
-            line_data.append([
-                line['line_id'],
-                line['status'].upper(),
-                f"{line['current_speed']:.0f} u/min",
-                f"{line['efficiency']:.1f}%",
-                f"{line['products_produced']:,}",
-                str(line['defects'])
-            ])
+        line_data = _table_rows(['Line ID', 'Status', 'Speed', 'Efficiency', 'Output', 'Defects'],
+                                production_lines, *PDF_LINE_ROW)
         
-        line_table = Table(line_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1.2*inch, 0.8*inch])
-        line_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        line_table = LongTable(line_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1.2*inch, 0.8*inch])
+        line_table.setStyle(CENTERED_TABLE_STYLE)
         elements.append(line_table)
         elements.append(Spacer(1, 20))
         
         # Quality Metrics Section
         elements.append(Paragraph("Quality Control Metrics", self.heading_style))
         
-        quality_data = [['Line ID', 'Inspected', 'Passed', 'Failed', 'Defect Rate', 'Quality Score']]
-        for qm in quality_metrics:
-            quality_data.append([
-                qm['line_id'],
-                f"{qm['total_inspected']:,}",
-                f"{qm['passed']:,}",
-                f"{qm['failed']:,}",
-                f"{qm['defect_rate']:.2f}%",
-                f"{qm['average_quality_score']:.1f}"
-            ])
+        quality_data = _table_rows(['Line ID', 'Inspected', 'Passed', 'Failed', 'Defect Rate', 'Quality Score'],
+                                   quality_metrics, *PDF_QUALITY_ROW)
         
-        quality_table = Table(quality_data, colWidths=[1.2*inch, 1.2*inch, 1*inch, 1*inch, 1.2*inch, 1.2*inch])
-        quality_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        quality_table = LongTable(quality_data, colWidths=[1.2*inch, 1.2*inch, 1*inch, 1*inch, 1.2*inch, 1.2*inch])
+        quality_table.setStyle(CENTERED_TABLE_STYLE)
         elements.append(quality_table)
         elements.append(Spacer(1, 20))
         
@@ -146,165 +211,79 @@ class ReportGenerator:
         if alerts:
             elements.append(Paragraph("Active Alerts", self.heading_style))
             
-            alert_data = [['Severity', 'Line', 'Title', 'Message']]
-            for alert in alerts[:10]:  # Limit to 10 most recent alerts
-                alert_data.append([
-                    alert['severity'].upper(),
-                    alert['line_id'],
-                    alert['title'],
-                    alert['message'][:50] + '...' if len(alert['message']) > 50 else alert['message']
-                ])
+            # Limit to 10 most recent alerts
+            alert_data = _table_rows(['Severity', 'Line', 'Title', 'Message'], alerts[:10], *PDF_ALERT_ROW)
             
             alert_table = Table(alert_data, colWidths=[1*inch, 1*inch, 1.5*inch, 3.2*inch])
-            alert_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            alert_table.setStyle(LEFT_ALIGNED_TABLE_STYLE)
             elements.append(alert_table)
         
         # Build PDF
         doc.build(elements)
         buffer.seek(0)
+        self._store_report('pdf', cache_key, buffer)
         return buffer
     
-    def generate_excel_report(self, production_lines, quality_metrics, overall_metrics, alerts):
-        """Generate a comprehensive Excel report"""
-        buffer = io.BytesIO()
-        wb = Workbook()
-        
-        # Remove default sheet
-        wb.remove(wb.active)
-        
-        # Header styles
-        header_fill = PatternFill(start_color="667eea", end_color="667eea", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        center_align = Alignment(horizontal="center", vertical="center")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+    def generate_excel_report(self, production_lines, quality_metrics, overall_metrics, alerts, cache_key=None):
+        """Generate a comprehensive Excel report, reusing the last one rendered for cache_key"""
+        cached = self._get_cached_report('excel', cache_key)
+        if cached:
+            return cached
         
-        # Overall Metrics Sheet
-        ws_overall = wb.create_sheet("Overall Metrics")
-        ws_overall.append(["Factory Process Monitoring Report"])
-        ws_overall.append([f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
-        ws_overall.append([])
-        ws_overall.append(["Metric", "Value"])
-        
-        overall_data = [
-            ["Total Output", f"{overall_metrics['total_output']:,} units"],
-            ["Total Defects", f"{overall_metrics['total_defects']:,} units"],
-            ["Overall OEE", f"{overall_metrics['overall_oee']}%"],
-            ["Average Efficiency", f"{overall_metrics['average_efficiency']}%"],
-            ["Active Lines", f"{overall_metrics['active_lines']}/{overall_metrics['total_lines']}"],
-            ["Critical Alerts", overall_metrics['critical_alerts']],
-            ["Warning Alerts", overall_metrics['warning_alerts']]
-        ]
-        
-        for row in overall_data:
-            ws_overall.append(row)
-        
-        # Style overall metrics
-        for cell in ws_overall[4]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_align
-            cell.border = border
-        
-        ws_overall.column_dimensions['A'].width = 25
-        ws_overall.column_dimensions['B'].width = 20
-        
-        # Production Lines Sheet
-        ws_lines = wb.create_sheet("Production Lines")
-        line_headers = ["Line ID", "Name", "Status", "Current Speed", "Target Speed", 
-                       "Efficiency (%)", "Uptime (%)", "Products Produced", "Defects"]
-        ws_lines.append(line_headers)
-        
-        for line in production_lines:
-            ws_lines.append([
-                line['line_id'],
-                line['name'],
-                line['status'].upper(),
-                f"{line['current_speed']:.2f}",
-                f"{line['target_speed']:.2f}",
-                f"{line['efficiency']:.2f}",
-                f"{line['uptime']:.2f}",
-                line['products_produced'],
-                line['defects']
-            ])
-        
-        # Style production lines
-        for cell in ws_lines[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_align
-            cell.border = border
-        
-        for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I']:
-            ws_lines.column_dimensions[col].width = 15
-        
-        # Quality Metrics Sheet
-        ws_quality = wb.create_sheet("Quality Metrics")
-        quality_headers = ["Line ID", "Total Inspected", "Passed", "Failed", 
-                          "Defect Rate (%)", "Quality Score", "Trend"]
-        ws_quality.append(quality_headers)
-        
-        for qm in quality_metrics:
-            ws_quality.append([
-                qm['line_id'],
-                qm['total_inspected'],
-                qm['passed'],
-                qm['failed'],
-                f"{qm['defect_rate']:.2f}",
-                f"{qm['average_quality_score']:.2f}",
-                qm['trend']
-            ])
-        
-        # Style quality metrics
-        for cell in ws_quality[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_align
-            cell.border = border
-        
-        for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
-            ws_quality.column_dimensions[col].width = 18
-        
-        # Alerts Sheet
-        if alerts:
-            ws_alerts = wb.create_sheet("Active Alerts")
-            alert_headers = ["Alert ID", "Line ID", "Severity", "Title", "Message", "Timestamp"]
-            ws_alerts.append(alert_headers)
+        buffer = io.BytesIO()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+            header_format = writer.book.add_format(HEADER_FORMAT)
             
-            for alert in alerts:
-                ws_alerts.append([
-                    alert['alert_id'],
-                    alert['line_id'],
-                    alert['severity'].upper(),
-                    alert['title'],
-                    alert['message'],
-                    alert['timestamp']
-                ])
+            # Overall Metrics Sheet
+            overall_df = pd.DataFrame([
+                ["Total Output", f"{overall_metrics['total_output']:,} units"],
+                ["Total Defects", f"{overall_metrics['total_defects']:,} units"],
+                ["Overall OEE", f"{overall_metrics['overall_oee']}%"],
+                ["Average Efficiency", f"{overall_metrics['average_efficiency']}%"],
+                ["Active Lines", f"{overall_metrics['active_lines']}/{overall_metrics['total_lines']}"],
+                ["Critical Alerts", overall_metrics['critical_alerts']],
+                ["Warning Alerts", overall_metrics['warning_alerts']]
+            ], columns=["Metric", "Value"])
+            ws_overall = self._write_sheet(writer, overall_df, "Overall Metrics", header_format, startrow=3)
+            ws_overall.write(0, 0, "Factory Process Monitoring Report")
+            ws_overall.write(1, 0, f"Generated: {timestamp}")
+            ws_overall.set_column(0, 0, 25)
+            ws_overall.set_column(1, 1, 20)
             
-            # Style alerts
-            for cell in ws_alerts[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = center_align
-                cell.border = border
+            # Production Lines Sheet
+            lines_df = pd.DataFrame(production_lines, columns=list(LINE_COLUMNS))
+            lines_df['status'] = lines_df['status'].str.upper()
+            for col in ('current_speed', 'target_speed', 'efficiency', 'uptime'):
+                lines_df[col] = lines_df[col].map('{:.2f}'.format)
+            ws_lines = self._write_sheet(writer, lines_df.rename(columns=LINE_COLUMNS),
+                                         "Production Lines", header_format)
+            ws_lines.set_column(0, len(LINE_COLUMNS) - 1, 15)
             
-            for col in ['A', 'B', 'C', 'D', 'E', 'F']:
-                ws_alerts.column_dimensions[col].width = 20
+            # Quality Metrics Sheet
+            quality_df = pd.DataFrame(quality_metrics, columns=list(QUALITY_COLUMNS))
+            for col in ('defect_rate', 'average_quality_score'):
+                quality_df[col] = quality_df[col].map('{:.2f}'.format)
+            ws_quality = self._write_sheet(writer, quality_df.rename(columns=QUALITY_COLUMNS),
+                                           "Quality Metrics", header_format)
+            ws_quality.set_column(0, len(QUALITY_COLUMNS) - 1, 18)
+            
+            # Alerts Sheet
+            if alerts:
+                alerts_df = pd.DataFrame(alerts, columns=list(ALERT_COLUMNS))
+                alerts_df['severity'] = alerts_df['severity'].str.upper()
+                ws_alerts = self._write_sheet(writer, alerts_df.rename(columns=ALERT_COLUMNS),
+                                              "Active Alerts", header_format)
+                ws_alerts.set_column(0, len(ALERT_COLUMNS) - 1, 20)
         
-        # Save to buffer
-        wb.save(buffer)
         buffer.seek(0)
+        self._store_report('excel', cache_key, buffer)
         return buffer
+    
+    def _write_sheet(self, writer, df: pd.DataFrame, sheet_name: str, header_format, startrow: int = 0):
+        """Write a DataFrame to its own sheet and restyle the header row"""
+        df.to_excel(writer, sheet_name=sheet_name, startrow=startrow, index=False)
+        worksheet = writer.sheets[sheet_name]
+        for col, header in enumerate(df.columns):
+            worksheet.write(startrow, col, header, header_format)
+        return worksheet
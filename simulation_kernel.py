@@ -0,0 +1,68 @@
+"""
+Simulation Kernel
+Advances production line state stored as NumPy arrays by one tick
+"""
+
+import numpy as np
+
+
+# Line status codes used by the kernel
+RUNNING = 0
+IDLE = 1
+MAINTENANCE = 2
+ERROR = 3
+
+# Number of uniform [0, 1) draws consumed per line on every tick
+RAND_COLUMNS = 10
+
+
+def step(speed, eff, temp, pres, vib, target, status, produced, defects, rand_u):
+    """
+    Advance every line by one tick, updating the arrays in place.
+    
+    rand_u is a (lines, RAND_COLUMNS) buffer of uniform draws filled by the
+    caller. Returns a boolean mask of the lines that completed maintenance.
+    """
+    running = status == RUNNING
+    idle = status == IDLE
+    maintenance = status == MAINTENANCE
+    
+    if running.any():
+        u = rand_u[running]
+        
+        # Speed variation
+        new_speed = np.clip(speed[running] + (u[:, 0] * 10 - 5), 0, target[running] * 1.1)
+        speed[running] = new_speed
+        
+        # Efficiency calculation
+        new_eff = np.clip(new_speed / target[running] * 100 + (u[:, 1] * 4 - 2), 70, 100)
+        eff[running] = new_eff
+        
+        # Environmental parameters
+        new_temp = np.clip(temp[running] + (u[:, 2] * 2 - 1), 18, 45)
+        temp[running] = new_temp
+        pres[running] = np.clip(pres[running] + (u[:, 3] * 0.4 - 0.2), 5.0, 7.0)
+        new_vib = np.clip(vib[running] + (u[:, 4] * 0.6 - 0.3), 0.3, 4.0)
+        vib[running] = new_vib
+        
+        # Production counts
+        produced[running] += (new_speed * 5 / 60).astype(np.int64)  # 5 second intervals
+        
+        # Defect simulation (higher chance with worse conditions)
+        defect_probability = (0.02
+                              + 0.03 * (new_temp > 38)
+                              + 0.02 * (new_vib > 3.0)
+                              + 0.02 * (new_eff < 80))
+        new_defects = 1 + (u[:, 6] * 3).astype(np.int64)
+        defects[running] += np.where(u[:, 5] < defect_probability, new_defects, 0)
+        
+        # Random status changes (rare, 1% chance) to running, idle or maintenance
+        changed = np.flatnonzero(running)[u[:, 7] < 0.01]
+        status[changed] = (rand_u[changed, 8] * 3).astype(status.dtype)
+    
+    # Stopped lines have no speed and may resume or complete maintenance
+    speed[idle | maintenance] = 0
+    completed = maintenance & (rand_u[:, 9] < 0.1)
+    status[(idle & (rand_u[:, 9] < 0.3)) | completed] = RUNNING
+    
+    return completed
@@ -14,6 +14,9 @@ let efficiencyChart = null;
 // Current filter for alerts
 let currentAlertFilter = 'all';
 
+// Latest full dashboard state, kept in sync by applying server deltas
+let dashboardState = null;
+
 // Connection status handling
 socket.on('connect', () => {
     updateConnectionStatus(true);
@@ -25,16 +28,56 @@ socket.on('disconnect', () => {
     console.log('Disconnected from server');
 });
 
-// Real-time production updates
-socket.on('production_update', (data) => {
+// Real-time production updates, sent as MessagePack-encoded binary frames
+socket.on('production_update', (packed) => {
+    const data = MessagePack.decode(new Uint8Array(packed));
+    if (data.delta) {
+        if (!dashboardState) return;
+        applyDelta(dashboardState, data);
+    } else {
+        dashboardState = data;
+    }
+
+    const state = dashboardState;
     updateLastUpdateTime();
-    updateOverallMetrics(data.overall_metrics);
-    updateProductionLines(data.production_lines);
-    updateAlerts(data.alerts, data.alert_counts);
-    updateMachineHealth(data.machine_health);
-    updateCharts(data);
+    updateOverallMetrics(state.overall_metrics);
+    updateProductionLines(state.production_lines);
+    updateAlerts(state.alerts, state.alert_counts);
+    updateMachineHealth(state.machine_health);
+    updateCharts(state);
 });
 
+/**
+ * Merge a delta update from the server into the dashboard state
+ */
+function applyDelta(state, delta) {
+    ['production_lines', 'quality_metrics', 'machine_health'].forEach(key => {
+        if (!delta[key]) return;
+        const changed = new Map(delta[key].map(item => [item.line_id, item]));
+        state[key] = state[key].map(item => changed.get(item.line_id) || item);
+    });
+
+    ['overall_metrics', 'quality_summary', 'alert_counts'].forEach(key => {
+        if (delta[key]) state[key] = delta[key];
+    });
+
+    if (delta.new_alerts || delta.changed_alerts || delta.removed_alert_ids) {
+        const removed = new Set(delta.removed_alert_ids || []);
+        const updates = new Map([...(delta.changed_alerts || []), ...(delta.new_alerts || [])]
+            .map(alert => [alert.alert_id, alert]));
+        // Replace alerts the client already has, then append the unseen ones
+        const alerts = state.alerts
+            .filter(alert => !removed.has(alert.alert_id))
+            .map(alert => {
+                const updated = updates.get(alert.alert_id);
+                updates.delete(alert.alert_id);
+                return updated || alert;
+            });
+        alerts.push(...updates.values());
+        state.alerts = alerts;
+    }
+}
+
 /**
  * Update connection status indicator
  */